@@ -1,13 +1,16 @@
 import openai
 import webbrowser
 import json
-from typing import Dict, Any
+import time
+from typing import Dict, Any, Optional
 from dotenv import load_dotenv
 import os
+from cassette import Cassette, CassetteMismatchError, cassette_from_env
 
 class BrowserAgent:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, cassette: Optional[Cassette] = None):
         self.client = openai.OpenAI(api_key=api_key)
+        self.cassette = cassette or Cassette()
         self.conversation_history = []
 
     def start_browser(self, url: str) -> Dict[str, Any]:
@@ -71,7 +74,8 @@ class BrowserAgent:
         messages = [system_message] + self.conversation_history
 
         try:
-            response = self.client.chat.completions.create(
+            response = self.cassette.chat_completion(
+                self.client.chat.completions.create,
                 model="gpt-3.5-turbo",
                 messages=messages,
                 functions=self.get_function_definitions(),
@@ -84,7 +88,7 @@ class BrowserAgent:
                 function_name = message.function_call.name
                 function_args = json.loads(message.function_call.arguments)
 
-                function_result = self.execute_function(function_name, function_args)
+                function_result = self.cassette.tool_call(self.execute_function, function_name, function_args)
 
                 self.conversation_history.append({
                     "role": "assistant",
@@ -101,7 +105,8 @@ class BrowserAgent:
                     "content": json.dumps(function_result)
                 })
 
-                final_response = self.client.chat.completions.create(
+                final_response = self.cassette.chat_completion(
+                    self.client.chat.completions.create,
                     model="gpt-3.5-turbo",
                     messages=[system_message] + self.conversation_history
                 )
@@ -122,6 +127,8 @@ class BrowserAgent:
                 })
 
                 return assistant_message
+        except CassetteMismatchError:
+            raise
         except Exception as e:
             return f"Error: {str(e)}"
 
@@ -130,12 +137,20 @@ def main():
     print("Browser Agent Starting...")
 
     api_key = os.getenv("OPENAI_API_KEY")
+    cassette = cassette_from_env()
+
+    if cassette.mode == "replay":
+        api_key = api_key or "replay"
+        print(f"Replaying cassette {cassette.path} ({cassette.timing} timing)")
+    elif cassette.mode == "record":
+        print(f"Recording cassette {cassette.path}")
 
     if not api_key:
         print("API key is required!")
         return
 
-    agent = BrowserAgent(api_key)
+    agent = BrowserAgent(api_key, cassette=cassette)
+    wall_time = 0.0
 
     print("I can help you open URLs in your browser. Just tell me what you'd like to do!")
     print("Type 'quit' to exit.\n")
@@ -148,10 +163,17 @@ def main():
                 break
             if not user_input:
                 continue
+            start = time.perf_counter()
             response = agent.chat_with_agent(user_input)
+            wall_time += time.perf_counter() - start
             print(f"Agent: {response}\n")
+            if cassette.mode != "off":
+                print(f"{cassette.report(wall_time)}\n")
         except KeyboardInterrupt:
             break
+        except CassetteMismatchError as e:
+            print(f"Replay diverged from the cassette: {e}")
+            break
         except Exception as e:
             print(f"Error: {e}\n")
 
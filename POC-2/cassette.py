@@ -0,0 +1,146 @@
+import difflib
+import hashlib
+import json
+import os
+import time
+from typing import Dict, Any, Optional, Callable
+from openai.types.chat import ChatCompletion
+
+class CassetteMismatchError(RuntimeError):
+    pass
+
+class ReplayedCallError(Exception):
+    def __init__(self, error_class: str, message: str):
+        super().__init__(message)
+        self.error_class = error_class
+
+class Cassette:
+    MODES = ["off", "record", "replay"]
+    TIMINGS = ["original", "zero"]
+
+    def __init__(self, path: Optional[str] = None, mode: str = "off", timing: str = "original"):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        if timing not in self.TIMINGS:
+            raise ValueError(f"Unknown cassette timing: {timing}")
+        if mode != "off" and not path:
+            raise ValueError(f"A cassette path is required in {mode} mode")
+
+        self.path = path
+        self.mode = mode
+        self.timing = timing
+        self.entries = []
+        self.position = 0
+        self.call_count = 0
+        self.recorded_latency = 0.0
+        self.external_time = 0.0
+
+        if self.mode == "record":
+            open(self.path, "w").close()
+        elif self.mode == "replay":
+            with open(self.path) as f:
+                self.entries = [json.loads(line) for line in f if line.strip()]
+
+    @staticmethod
+    def _hash(data: Any) -> str:
+        encoded = json.dumps(data, sort_keys=True, default=str).encode()
+        return hashlib.sha256(encoded).hexdigest()[:16]
+
+    def _write(self, entry: Dict[str, Any]):
+        with open(self.path, "a") as f:
+            f.write(json.dumps(entry, separators=(",", ":"), default=str) + "\n")
+
+    @staticmethod
+    def _difference(recorded: Any, request: Any) -> str:
+        if isinstance(recorded, dict) and isinstance(request, dict):
+            for name in sorted(set(recorded) | set(request)):
+                if recorded.get(name) != request.get(name):
+                    return f"{name}: " + Cassette._difference(recorded.get(name), request.get(name))
+        if isinstance(recorded, list) and isinstance(request, list):
+            for index in range(max(len(recorded), len(request))):
+                old = recorded[index] if index < len(recorded) else None
+                new = request[index] if index < len(request) else None
+                if old != new:
+                    return f"[{index}] " + Cassette._difference(old, new)
+        if isinstance(recorded, str) and isinstance(request, str):
+            diff = difflib.unified_diff(recorded.splitlines(), request.splitlines(), "recorded", "request", lineterm="", n=1)
+            return "\n" + "\n".join(list(diff)[:20])
+        return f"recorded {json.dumps(recorded, default=str)[:200]}, got {json.dumps(request, default=str)[:200]}"
+
+    def _next(self, kind: str, key: str, request: Any) -> Dict[str, Any]:
+        if self.position >= len(self.entries):
+            raise CassetteMismatchError(f"Cassette exhausted, no recorded {kind} left for {key}")
+
+        entry = self.entries[self.position]
+        if entry["type"] != kind or entry["key"] != key:
+            message = f"Cassette entry #{self.position} is {entry['type']} {entry['key']}, expected {kind} {key}"
+            if entry["type"] == kind and "request" in entry:
+                message += "\n" + self._difference(entry["request"], json.loads(json.dumps(request, default=str)))
+            raise CassetteMismatchError(message)
+        self.position += 1
+
+        if self.timing == "original":
+            time.sleep(entry["elapsed"])
+        return entry
+
+    def _call(self, kind: str, request: Any, call: Callable[[], Any], encode: Callable[[Any], Any], decode: Callable[[Any], Any]):
+        self.call_count += 1
+        key = self._hash(request)
+        start = time.perf_counter()
+        try:
+            if self.mode == "replay":
+                entry = self._next(kind, key, request)
+                self.recorded_latency += entry["elapsed"]
+                if "error" in entry:
+                    raise ReplayedCallError(entry["error"]["class"], entry["error"]["message"])
+                return decode(entry["response"])
+
+            entry = {"type": kind, "key": key, "request": request}
+            try:
+                result = call()
+                entry["response"] = encode(result)
+                return result
+            except Exception as e:
+                entry["error"] = {"class": type(e).__name__, "message": str(e)}
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                self.recorded_latency += elapsed
+                if self.mode == "record":
+                    entry["elapsed"] = round(elapsed, 4)
+                    self._write(entry)
+        finally:
+            self.external_time += time.perf_counter() - start
+
+    def chat_completion(self, create: Callable[..., ChatCompletion], **kwargs) -> ChatCompletion:
+        return self._call(
+            "chat",
+            kwargs,
+            lambda: create(**kwargs),
+            lambda response: response.model_dump(exclude_none=True),
+            ChatCompletion.model_validate
+        )
+
+    def tool_call(self, execute: Callable[[str, Dict[str, Any]], Dict[str, Any]], function_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        return self._call(
+            "tool",
+            {"function_name": function_name, "arguments": arguments},
+            lambda: execute(function_name, arguments),
+            lambda result: result,
+            lambda result: result
+        )
+
+    def report(self, wall_time: float) -> str:
+        overhead = wall_time - self.external_time
+        return (
+            f"Cassette ({self.mode}): {self.call_count} calls, "
+            f"recorded latency {self.recorded_latency:.2f}s, "
+            f"agent overhead {overhead:.3f}s of {wall_time:.2f}s"
+        )
+
+def cassette_from_env() -> Cassette:
+    return Cassette(
+        os.getenv("CASSETTE_PATH", "cassette.jsonl"),
+        os.getenv("CASSETTE_MODE", "off").lower(),
+        os.getenv("CASSETTE_TIMING", "original").lower()
+    )
@@ -4,14 +4,21 @@ import urllib.parse
 from typing import Dict, Any, Optional, List
 from dotenv import load_dotenv
 import os
+import shutil
+import signal
+import subprocess
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
 import atexit
 from dataclasses import dataclass
 from enum import Enum
+from cassette import Cassette, CassetteMismatchError, cassette_from_env
 
 class AgentStatus(Enum):
     PLANNING = "planning"
@@ -42,29 +49,361 @@ class AgentState:
         if self.errors is None:
             self.errors = []
 
+class BrowserDaemon:
+    REQUIRED_FLAGS = [
+        "--no-first-run",
+        "--no-default-browser-check",
+        "--no-sandbox",
+        "--disable-dev-shm-usage",
+        "--disable-blink-features=AutomationControlled",
+        "--disable-popup-blocking",
+    ]
+
+    def __init__(self, user_data_dir: str, port: int = 9222, binary: Optional[str] = None):
+        self.user_data_dir = os.path.abspath(os.path.expanduser(user_data_dir))
+        self.port = port
+        self.binary = binary
+        self.pid_file = os.path.join(self.user_data_dir, "daemon.pid")
+
+    @property
+    def address(self) -> str:
+        return f"127.0.0.1:{self.port}"
+
+    def is_healthy(self) -> bool:
+        try:
+            with urllib.request.urlopen(f"http://{self.address}/json/version", timeout=2) as response:
+                info = json.loads(response.read().decode())
+            return "webSocketDebuggerUrl" in info
+        except Exception:
+            return False
+
+    def _find_binary(self) -> str:
+        if self.binary:
+            return self.binary
+        for name in ["google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome"]:
+            path = shutil.which(name)
+            if path:
+                return path
+        raise RuntimeError("Chrome binary not found, set CHROME_BINARY")
+
+    def _read_pid(self) -> Optional[int]:
+        try:
+            with open(self.pid_file) as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return None
+
+    def _command(self, pid: int) -> List[str]:
+        try:
+            with open(f"/proc/{pid}/cmdline", "rb") as f:
+                return f.read().decode(errors="replace").split("\0")
+        except FileNotFoundError:
+            if os.path.isdir("/proc"):
+                return []
+            result = subprocess.run(["ps", "-o", "command=", "-p", str(pid)], capture_output=True, text=True)
+            return result.stdout.split()
+        except OSError:
+            return []
+
+    def _owns(self, pid: int) -> bool:
+        return f"--user-data-dir={self.user_data_dir}" in self._command(pid)
+
+    def _has_required_flags(self, pid: int) -> bool:
+        command = self._command(pid)
+        return all(flag in command for flag in self.REQUIRED_FLAGS)
+
+    def _wait_for_exit(self, pid: int, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if not self._owns(pid):
+                return True
+            time.sleep(0.25)
+        return not self._owns(pid)
+
+    def stop(self, timeout: float = 5):
+        pid = self._read_pid()
+        if pid and self._owns(pid):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except OSError:
+                pass
+            if not self._wait_for_exit(pid, timeout):
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except OSError:
+                    pass
+                if not self._wait_for_exit(pid, timeout):
+                    raise RuntimeError(f"Browser daemon {pid} did not exit")
+        try:
+            os.remove(self.pid_file)
+        except OSError:
+            pass
+
+    def start(self, timeout: float = 15):
+        os.makedirs(self.user_data_dir, exist_ok=True)
+        process = subprocess.Popen(
+            [
+                self._find_binary(),
+                f"--remote-debugging-port={self.port}",
+                f"--user-data-dir={self.user_data_dir}",
+            ] + self.REQUIRED_FLAGS,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True
+        )
+        with open(self.pid_file, "w") as f:
+            f.write(str(process.pid))
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.is_healthy():
+                return
+            if process.poll() is not None:
+                break
+            time.sleep(0.25)
+        raise RuntimeError(f"Browser daemon did not become healthy on {self.address}")
+
+    def ensure_running(self) -> bool:
+        if self.is_healthy():
+            pid = self._read_pid()
+            if pid and self._owns(pid):
+                if self._has_required_flags(pid):
+                    return True
+                print("Browser daemon was started with other flags, restarting it...")
+                self.stop()
+                self.start()
+                return False
+            raise RuntimeError(
+                f"Port {self.port} is used by a browser that was not started for {self.user_data_dir}, "
+                "close it or set CHROME_DEBUG_PORT to another port"
+            )
+
+        self.stop()
+        self.start()
+        return False
+
+class SpeculativeExecutor:
+    def __init__(self, agent: "AutonomousWebSearchAgent"):
+        self.agent = agent
+        self.pool = ThreadPoolExecutor(max_workers=1)
+        self.speculation = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.attempts = 0
+        self.hits = 0
+        self.failures = 0
+        self.time_saved = 0.0
+
+    def predict(self) -> Optional[Dict[str, Any]]:
+        if self.agent.driver is None or not self.agent.agent_state.completed_steps:
+            return None
+
+        last_step = self.agent.agent_state.completed_steps[-1]
+        if not last_step["result"].get("success", False):
+            return None
+
+        if last_step["function"] == "search_on_google":
+            return {"function_name": "analyze_page_and_click_link", "arguments": {"link_index": 0}}
+        if last_step["function"] == "analyze_page_and_click_link":
+            return {"function_name": "get_page_content", "arguments": {"extract_text": True}}
+        return None
+
+    def _start(self):
+        prediction = self.predict()
+        if prediction is None:
+            return
+
+        driver = self.agent.driver
+        started = time.perf_counter()
+        self.attempts += 1
+        try:
+            if prediction["function_name"] == "analyze_page_and_click_link":
+                results = driver.find_elements(By.CSS_SELECTOR, "h3 a, .yuRUbf a")
+                if not results:
+                    self.failures += 1
+                    return
+                link_url = results[0].get_attribute("href")
+                link_title = results[0].get_attribute("title") or results[0].text
+
+                original_handle = driver.current_window_handle
+                handles = set(driver.window_handles)
+                driver.execute_script("window.open(arguments[0], '_blank');", link_url)
+                new_handles = set(driver.window_handles) - handles
+                if not new_handles:
+                    self.failures += 1
+                    return
+
+                self.speculation = {
+                    "prediction": prediction,
+                    "original_handle": original_handle,
+                    "handle": new_handles.pop()
+                }
+                self.speculation["previous_page"] = {"title": driver.title, "url": driver.current_url}
+                self.speculation["clicked_link"] = {
+                    "title": link_title[:100] + "..." if len(link_title) > 100 else link_title,
+                    "url": link_url
+                }
+            else:
+                result = self.agent.get_page_content(True)
+                if not result.get("success", False):
+                    self.failures += 1
+                    return
+                self.speculation = {
+                    "prediction": prediction,
+                    "result": result,
+                    "elapsed": time.perf_counter() - started
+                }
+        except Exception:
+            self.failures += 1
+            self.discard()
+
+    def _timed_evaluate(self) -> Dict[str, Any]:
+        result = self.agent.evaluate_progress()
+        self.evaluated_at = time.perf_counter()
+        return result
+
+    def evaluate(self) -> Dict[str, Any]:
+        self.discard()
+        self.evaluated_at = None
+        future = self.pool.submit(self._timed_evaluate)
+        self._start()
+        speculated_at = time.perf_counter()
+        result = future.result()
+        if self.evaluated_at is not None and speculated_at > self.evaluated_at:
+            self.time_saved -= speculated_at - self.evaluated_at
+        return result
+
+    def _matches(self, function_name: str, arguments: Dict[str, Any]) -> bool:
+        prediction = self.speculation["prediction"]
+        if function_name != prediction["function_name"]:
+            return False
+        if function_name == "analyze_page_and_click_link":
+            return (not arguments.get("link_text") and not arguments.get("css_selector")
+                    and arguments.get("link_index", 0) == 0)
+        return arguments.get("extract_text", True) is True
+
+    def commit(self, function_name: str, arguments: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if self.speculation is None:
+            return None
+        if not self._matches(function_name, arguments):
+            self.discard()
+            return None
+
+        speculation = self.speculation
+        self.speculation = None
+        if function_name == "get_page_content":
+            self.hits += 1
+            self.time_saved += speculation["elapsed"]
+            return speculation["result"]
+
+        driver = self.agent.driver
+        started = time.perf_counter()
+        try:
+            driver.switch_to.window(speculation["handle"])
+            WebDriverWait(driver, 15).until(
+                lambda driver: driver.current_url not in ["about:blank", ""]
+            )
+            navigation_time = driver.execute_script(
+                "const t = performance.timing; return t.responseStart > 0 ? (t.responseStart - t.navigationStart) / 1000 : 0;"
+            )
+            driver.switch_to.window(speculation["original_handle"])
+            driver.close()
+            driver.switch_to.window(speculation["handle"])
+        except Exception:
+            self.failures += 1
+            self.time_saved -= time.perf_counter() - started
+            self.speculation = speculation
+            self.discard()
+            return None
+
+        self.hits += 1
+        self.time_saved += (navigation_time or 0) - (time.perf_counter() - started)
+        return {
+            "success": True,
+            "message": "Successfully clicked on link using search result #1 and navigated to new page (prefetched)",
+            "page_analysis": {
+                "previous_page": speculation["previous_page"],
+                "clicked_link": speculation["clicked_link"],
+                "current_page": {
+                    "title": driver.title,
+                    "url": driver.current_url
+                }
+            }
+        }
+
+    def discard(self):
+        if self.speculation is None:
+            return
+
+        speculation = self.speculation
+        self.speculation = None
+        if "handle" in speculation and self.agent.driver is not None:
+            driver = self.agent.driver
+            started = time.perf_counter()
+            try:
+                driver.switch_to.window(speculation["handle"])
+                driver.close()
+                driver.switch_to.window(speculation["original_handle"])
+            except Exception:
+                pass
+            self.time_saved -= time.perf_counter() - started
+
+    def report(self) -> str:
+        return (f"Speculation: {self.hits}/{self.attempts} hits, {self.failures} failed, "
+                f"{self.time_saved:+.2f}s net latency saved")
+
 class AutonomousWebSearchAgent:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, warm_start: bool = False, daemon: Optional[BrowserDaemon] = None,
+                 cassette: Optional[Cassette] = None, speculative: bool = False):
         self.client = openai.OpenAI(api_key=api_key)
+        self.cassette = cassette or Cassette()
         self.conversation_history = []
         self.driver = None
         self.wait = None
         self.agent_state = AgentState()
+        self.warm_start = warm_start
+        self.daemon = daemon
+        if self.warm_start and self.daemon is None:
+            self.daemon = BrowserDaemon(
+                os.getenv("CHROME_USER_DATA_DIR", "~/.agent-pocs/chrome-profile"),
+                int(os.getenv("CHROME_DEBUG_PORT", "9222")),
+                os.getenv("CHROME_BINARY")
+            )
+        self.start_mode = None
+        self.driver_start_time = None
+        self.time_to_first_page = None
+        self.speculator = SpeculativeExecutor(self) if speculative else None
         
         atexit.register(self.cleanup)
 
     def _initialize_driver(self):
         if self.driver is None:
+            self.driver_start_time = time.perf_counter()
+
             options = webdriver.ChromeOptions()
-            options.add_argument('--no-sandbox')
-            options.add_argument('--disable-dev-shm-usage')
-            options.add_argument('--disable-blink-features=AutomationControlled')
-            options.add_experimental_option("excludeSwitches", ["enable-automation"])
-            options.add_experimental_option('useAutomationExtension', False)
+            if self.warm_start:
+                already_running = self.daemon.ensure_running()
+                self.start_mode = "warm" if already_running else "cold"
+                options.add_experimental_option("debuggerAddress", self.daemon.address)
+            else:
+                self.start_mode = "cold"
+                options.add_argument('--no-sandbox')
+                options.add_argument('--disable-dev-shm-usage')
+                options.add_argument('--disable-blink-features=AutomationControlled')
+                options.add_experimental_option("excludeSwitches", ["enable-automation"])
+                options.add_experimental_option('useAutomationExtension', False)
 
             self.driver = webdriver.Chrome(options=options)
             self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
             self.wait = WebDriverWait(self.driver, 10)
 
+    def _record_first_page(self):
+        if self.time_to_first_page is None and self.driver_start_time is not None:
+            self.time_to_first_page = time.perf_counter() - self.driver_start_time
+            self.driver_start_time = None
+            print(f"Time to first page ({self.start_mode} start): {self.time_to_first_page:.2f}s")
+
     def search_on_google(self, query: str) -> Dict[str, Any]:
         try:
             self._initialize_driver()
@@ -74,6 +413,7 @@ class AutonomousWebSearchAgent:
 
             self.driver.get(search_url)
             self.wait.until(EC.presence_of_element_located((By.ID, "search")))
+            self._record_first_page()
 
             try:
                 results = self.driver.find_elements(By.CSS_SELECTOR, "h3 a, .yuRUbf a")
@@ -219,6 +559,9 @@ class AutonomousWebSearchAgent:
             }
 
     def cleanup(self):
+        if self.speculator:
+            self.speculator.discard()
+            self.speculator.pool.shutdown(wait=False)
         if self.driver:
             try:
                 self.driver.quit()
@@ -273,7 +616,34 @@ class AutonomousWebSearchAgent:
             }
         ]
 
+    def _driver_alive(self) -> bool:
+        try:
+            self.driver.current_window_handle
+            return True
+        except WebDriverException:
+            return False
+
     def execute_function(self, function_name: str, arguments: Dict[str, Any]):
+        result = self._dispatch_function(function_name, arguments)
+        if self.warm_start and self.driver is not None and not result.get("success", False) and not self._driver_alive():
+            print("Lost the browser daemon, restarting it and attaching again...")
+            try:
+                self.driver.quit()
+            except:
+                pass
+            self.driver = None
+            self.wait = None
+            try:
+                self._initialize_driver()
+            except Exception as e:
+                return {
+                    "success": False,
+                    "message": f"Failed to restart the browser daemon: {str(e)}"
+                }
+            result = self._dispatch_function(function_name, arguments)
+        return result
+
+    def _dispatch_function(self, function_name: str, arguments: Dict[str, Any]):
         if function_name == "search_on_google":
             query = arguments.get("query", "")
             return self.search_on_google(query)
@@ -288,6 +658,13 @@ class AutonomousWebSearchAgent:
         else:
             return {"error": f"Unknown function: {function_name}"}
 
+    def _execute_action(self, function_name: str, arguments: Dict[str, Any]):
+        if self.speculator:
+            result = self.speculator.commit(function_name, arguments)
+            if result is not None:
+                return result
+        return self.execute_function(function_name, arguments)
+
     def create_plan(self, user_message: str) -> Dict[str, Any]:
         planning_prompt = f"""
         Analyze this user request and create a detailed action plan:
@@ -311,7 +688,8 @@ class AutonomousWebSearchAgent:
         """
 
         try:
-            response = self.client.chat.completions.create(
+            response = self.cassette.chat_completion(
+                self.client.chat.completions.create,
                 model="gpt-4o-mini",
                 messages=[{"role": "user", "content": planning_prompt}],
                 temperature=0.1
@@ -329,6 +707,8 @@ class AutonomousWebSearchAgent:
                 "success": True,
                 "plan_data": plan_data
             }
+        except CassetteMismatchError:
+            raise
         except Exception as e:
             return {
                 "success": False,
@@ -378,7 +758,8 @@ class AutonomousWebSearchAgent:
         """
 
         try:
-            response = self.client.chat.completions.create(
+            response = self.cassette.chat_completion(
+                self.client.chat.completions.create,
                 model="gpt-4o-mini",
                 messages=[{"role": "user", "content": evaluation_prompt}],
                 temperature=0.1
@@ -397,6 +778,8 @@ class AutonomousWebSearchAgent:
                 "success": True,
                 "evaluation": evaluation
             }
+        except CassetteMismatchError:
+            raise
         except Exception as e:
             return {
                 "success": False,
@@ -405,6 +788,9 @@ class AutonomousWebSearchAgent:
 
     def execute_autonomous_task(self, user_message: str) -> str:
         self.agent_state = AgentState()
+        self.time_to_first_page = None
+        if self.speculator:
+            self.speculator.reset_stats()
 
         print("Creating action plan...")
 
@@ -430,7 +816,10 @@ class AutonomousWebSearchAgent:
             self.agent_state.iteration_count += 1
             print(f"Iteration {self.agent_state.iteration_count}")
 
-            eval_result = self.evaluate_progress()
+            if self.speculator:
+                eval_result = self.speculator.evaluate()
+            else:
+                eval_result = self.evaluate_progress()
             if not eval_result["success"]:
                 self.agent_state.errors.append(eval_result["error"])
                 continue
@@ -453,7 +842,7 @@ class AutonomousWebSearchAgent:
                 arguments = next_action["arguments"]
                 reasoning = next_action.get("reasoning", "")
 
-                result = self.execute_function(function_name, arguments)
+                result = self.cassette.tool_call(self._execute_action, function_name, arguments)
 
                 step_result = {
                     "iteration": self.agent_state.iteration_count,
@@ -476,6 +865,9 @@ class AutonomousWebSearchAgent:
 
             print()
 
+        if self.speculator:
+            self.speculator.discard()
+
         if self.agent_state.iteration_count >= self.agent_state.max_iterations:
             self.agent_state.status = AgentStatus.MAX_ITERATIONS
 
@@ -499,6 +891,10 @@ Iterations: {self.agent_state.iteration_count}
 Successful actions: {len([s for s in self.agent_state.completed_steps if s['result'].get('success', False)])}
 Errors: {len(self.agent_state.errors)}
 """
+        if self.time_to_first_page is not None:
+            report += f"Time to first page ({self.start_mode} start): {self.time_to_first_page:.2f}s\n"
+        if self.speculator:
+            report += f"{self.speculator.report()}\n"
         return report.strip()
 
     def chat_with_agent(self, user_message: str) -> str:
@@ -509,13 +905,25 @@ def main():
     print("Autonomous Web Search Agent started...")
 
     api_key = os.getenv("OPENAI_API_KEY")
+    cassette = cassette_from_env()
+
+    if cassette.mode == "replay":
+        api_key = api_key or "replay"
+        print(f"Replaying cassette {cassette.path} ({cassette.timing} timing)")
+    elif cassette.mode == "record":
+        print(f"Recording cassette {cassette.path}")
 
     if not api_key:
         print("OpenAI API key required!")
         return
 
     try:
-        agent = AutonomousWebSearchAgent(api_key)
+        warm_start = os.getenv("WARM_START", "false").lower() in ["1", "true", "yes"]
+        speculative = os.getenv("SPECULATIVE_PREFETCH", "false").lower() in ["1", "true", "yes"]
+        agent = AutonomousWebSearchAgent(api_key, warm_start=warm_start, cassette=cassette, speculative=speculative)
+        if warm_start:
+            print(f"Warm-start mode: attaching to browser daemon on {agent.daemon.address}")
+        wall_time = 0.0
 
         print("\nExample queries:")
         print("- 'open youtube'")
@@ -531,12 +939,19 @@ def main():
                     continue
 
                 print("\n" + "="*50)
+                start = time.perf_counter()
                 response = agent.chat_with_agent(user_input)
+                wall_time += time.perf_counter() - start
                 print("="*50)
                 print(f"\n{response}\n")
+                if cassette.mode != "off":
+                    print(f"{cassette.report(wall_time)}\n")
 
             except KeyboardInterrupt:
                 break
+            except CassetteMismatchError as e:
+                print(f"Replay diverged from the cassette: {e}")
+                break
             except Exception as e:
                 print(f"Error: {e}\n")
                 